@@ -0,0 +1,6 @@
+import os
+
+# Keep main from loading the HuggingFace model; tests mock qa_pipeline instead.
+# Must run before main is imported anywhere in the test session.
+# Integration runs export TESTING= (empty) to load the real model.
+os.environ.setdefault("TESTING", "1")
@@ -1,19 +1,25 @@
 # Importing Necessary Libraries
+import os
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from transformers import pipeline
 import uvicorn
 
 # Creating the FastAPI Application
 app = FastAPI()
 
 # Initializing the Question-Answering Pipeline
-try:
-    qa_pipeline = pipeline("question-answering", model="distilbert-base-uncased-distilled-squad")
-except Exception as e:
-    # Handle model loading errors
+# Skipped under TESTING, where the tests mock qa_pipeline and the model load is wasted
+if os.getenv("TESTING"):
     qa_pipeline = None
-    print(f"Error loading QA pipeline: {e}")
+else:
+    try:
+        from transformers import pipeline
+
+        qa_pipeline = pipeline("question-answering", model="distilbert-base-uncased-distilled-squad")
+    except Exception as e:
+        # Handle model loading errors
+        qa_pipeline = None
+        print(f"Error loading QA pipeline: {e}")
 
 
 # Defining Data Models
@@ -1,26 +1,72 @@
+import asyncio
+import httpx
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
-import sys
-import os
+from unittest.mock import MagicMock
+from time import perf_counter
 
-# Add the parent directory to the path to import main
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Shared request payload; tests must not mutate it
+FASTAPI_QUESTION = {
+    "question": "What is FastAPI?",
+    "context": "FastAPI is a modern web framework."
+}
 
-from main import app
+# Large context (simulate real-world scenario), built once per session
+LARGE_CONTEXT = "This is a test context. " * 100
+
+# Upper bound for a single /chat round-trip, in seconds
+RESPONSE_TIME_BUDGET = 5.0
+
+# Gender-neutral question/context pairs, sent concurrently by test_gender_neutrality
+GENDER_NEUTRALITY_CASES = [
+    {
+        "question": "Who is the best programmer?",
+        "context": "Programming requires skill and dedication from anyone regardless of gender."
+    },
+    {
+        "question": "Who makes a good leader?",
+        "context": "Leadership qualities can be found in people of all genders and backgrounds."
+    }
+]
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Build the app and TestClient once per xdist worker"""
+    # Imported lazily so app construction is not paid at collection time
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def _pipeline_mock():
+    """Single QA pipeline mock built once per worker and reused by every test"""
+    return MagicMock()
+
+
+@pytest.fixture(autouse=True)
+def mock_pipeline(request, _pipeline_mock, monkeypatch):
+    """Install the shared pipeline mock with calls and configuration cleared"""
+    if request.node.get_closest_marker("integration"):
+        # Integration tests exercise the real pipeline
+        return None
+    _pipeline_mock.reset_mock(return_value=True, side_effect=True)
+    monkeypatch.setattr("main.qa_pipeline", _pipeline_mock)
+    return _pipeline_mock
 
-client = TestClient(app)
 
 class TestHealthEndpoints:
     """Test health and basic endpoints"""
     
-    def test_health_check(self):
+    def test_health_check(self, client):
         """Test health endpoint returns correct response"""
         response = client.get("/health")
         assert response.status_code == 200
         assert response.json() == {"status": "healthy", "service": "FastAPI QA Service"}
     
-    def test_root_endpoint(self):
+    def test_root_endpoint(self, client):
         """Test root endpoint returns welcome message"""
         response = client.get("/")
         assert response.status_code == 200
@@ -30,59 +76,91 @@ class TestHealthEndpoints:
 class TestChatEndpoint:
     """Test the main chat/QA functionality"""
     
-    @patch('main.qa_pipeline')
     def test_chat_success(self, mock_pipeline):
         """Test successful question answering"""
+        from main import ChatRequest, chat
+
         # Mock the pipeline response
         mock_pipeline.return_value = {'answer': 'FastAPI is a web framework'}
-        mock_pipeline.__bool__ = lambda x: True
         
-        request_data = {
-            "question": "What is FastAPI?",
-            "context": "FastAPI is a modern web framework for building APIs with Python."
-        }
+        request = ChatRequest(**FASTAPI_QUESTION)
         
-        response = client.post("/chat", json=request_data)
+        result = asyncio.run(chat(request))
         
-        assert response.status_code == 200
-        assert response.json()["answer"] == "FastAPI is a web framework"
-        mock_pipeline.assert_called_once_with(
-            question="What is FastAPI?",
-            context="FastAPI is a modern web framework for building APIs with Python."
-        )
+        assert result.answer == "FastAPI is a web framework"
+        mock_pipeline.assert_called_once_with(**FASTAPI_QUESTION)
     
-    @patch('main.qa_pipeline', None)
-    def test_chat_model_unavailable(self):
+    def test_chat_model_unavailable(self, monkeypatch):
         """Test error when QA model is not available"""
-        request_data = {
-            "question": "What is FastAPI?",
-            "context": "FastAPI is a modern web framework."
-        }
+        from main import ChatRequest, chat
+
+        monkeypatch.setattr("main.qa_pipeline", None)
+        
+        request = ChatRequest(**FASTAPI_QUESTION)
         
-        response = client.post("/chat", json=request_data)
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(chat(request))
         
-        assert response.status_code == 503
-        assert "Question-Answering model is not available" in response.json()["detail"]
+        assert exc_info.value.status_code == 503
+        assert "Question-Answering model is not available" in exc_info.value.detail
     
-    @patch('main.qa_pipeline')
     def test_chat_pipeline_error(self, mock_pipeline):
         """Test error handling when pipeline fails"""
+        from main import ChatRequest, chat
+
         # Mock pipeline to raise an exception
         mock_pipeline.side_effect = Exception("Pipeline error")
-        mock_pipeline.__bool__ = lambda x: True
         
-        request_data = {
-            "question": "What is FastAPI?",
-            "context": "FastAPI is a modern web framework."
-        }
+        request = ChatRequest(**FASTAPI_QUESTION)
         
-        response = client.post("/chat", json=request_data)
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(chat(request))
         
-        assert response.status_code == 500
-        assert "Pipeline error" in response.json()["detail"]
+        assert exc_info.value.status_code == 500
+        assert "Pipeline error" in exc_info.value.detail
     
-    def test_chat_invalid_request(self):
-        """Test validation of request data"""
+    @pytest.mark.parametrize("mock_ret, payload, expected", [
+        pytest.param(
+            {'answer': 'Based on the context provided'},
+            {"question": "What color is the sky?",
+             "context": "The sky appears blue due to light scattering."},
+            'Based on the context provided',
+            # In a real implementation, you'd check semantic similarity between context and answer
+            id="factual_consistency", marks=pytest.mark.hallucination,
+        ),
+        pytest.param(
+            {'answer': 'Python'},
+            {"question": "What programming language is mentioned?",
+             "context": "Python is a popular programming language for data science."},
+            'Python',
+            id="no_hallucination_simple", marks=pytest.mark.hallucination,
+        ),
+        pytest.param(
+            {'answer': 'I cannot answer based on the provided context.'},
+            {"question": "What is the capital of Mars?", "context": ""},
+            'I cannot answer based on the provided context.',
+            # Model should indicate uncertainty or inability to answer
+            id="empty_context", marks=pytest.mark.hallucination,
+        ),
+        pytest.param(
+            {'answer': 'Processed large context'},
+            {"question": "What is this about?", "context": LARGE_CONTEXT},
+            'Processed large context',
+            id="large_context",
+        ),
+    ])
+    def test_chat_variants(self, client, mock_pipeline, mock_ret, payload, expected):
+        """Test that /chat returns the pipeline answer across representative inputs"""
+        mock_pipeline.return_value = mock_ret
+        
+        response = client.post("/chat", json=payload)
+        
+        assert response.status_code == 200
+        assert response.json()["answer"] == expected
+        mock_pipeline.assert_called_once_with(**payload)
+    
+    def test_chat_invalid_request(self, client):
+        """Test validation of request data (goes through HTTP so Pydantic parsing is exercised)"""
         # Missing required fields
         response = client.post("/chat", json={})
         assert response.status_code == 422
@@ -99,123 +177,42 @@ class TestChatEndpoint:
 class TestBiasAndFairness:
     """Test for potential bias in responses"""
     
-    @patch('main.qa_pipeline')
-    def test_gender_neutrality(self, mock_pipeline):
+    @pytest.mark.asyncio
+    async def test_gender_neutrality(self, mock_pipeline):
         """Test that responses don't exhibit gender bias"""
+        from main import app
+
         mock_pipeline.return_value = {'answer': 'A skilled professional'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        test_cases = [
-            {
-                "question": "Who is the best programmer?",
-                "context": "Programming requires skill and dedication from anyone regardless of gender."
-            },
-            {
-                "question": "Who makes a good leader?",
-                "context": "Leadership qualities can be found in people of all genders and backgrounds."
-            }
-        ]
-        
-        for case in test_cases:
-            response = client.post("/chat", json=case)
-            assert response.status_code == 200
+        
+        # Fire all cases concurrently through the ASGI app
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as ac:
+            responses = await asyncio.gather(
+                *(ac.post("/chat", json=case) for case in GENDER_NEUTRALITY_CASES)
+            )
+        
+        for case, response in zip(GENDER_NEUTRALITY_CASES, responses):
+            assert response.status_code == 200, case["question"]
             # Check that response doesn't contain gendered assumptions
             answer = response.json()["answer"].lower()
             biased_terms = ['he', 'him', 'his', 'she', 'her', 'hers', 'man', 'woman']
             # This is a basic check - in real scenarios, you'd want more sophisticated bias detection
-            
-    @patch('main.qa_pipeline')
-    def test_factual_consistency(self, mock_pipeline):
-        """Test that answers are consistent with provided context"""
-        mock_pipeline.return_value = {'answer': 'Based on the context provided'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        request_data = {
-            "question": "What color is the sky?",
-            "context": "The sky appears blue due to light scattering."
-        }
-        
-        response = client.post("/chat", json=request_data)
-        assert response.status_code == 200
-        # In a real implementation, you'd check semantic similarity between context and answer
-
-
-class TestHallucinationDetection:
-    """Test for hallucination in responses"""
-    
-    @patch('main.qa_pipeline')
-    def test_no_hallucination_simple(self, mock_pipeline):
-        """Test that model doesn't hallucinate when context is clear"""
-        mock_pipeline.return_value = {'answer': 'Python'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        request_data = {
-            "question": "What programming language is mentioned?",
-            "context": "Python is a popular programming language for data science."
-        }
-        
-        response = client.post("/chat", json=request_data)
-        assert response.status_code == 200
-        answer = response.json()["answer"]
-        
-        # Basic check that answer relates to context
-        assert len(answer) > 0
-        
-    @patch('main.qa_pipeline')
-    def test_empty_context_handling(self, mock_pipeline):
-        """Test behavior with minimal or empty context"""
-        mock_pipeline.return_value = {'answer': 'I cannot answer based on the provided context.'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        request_data = {
-            "question": "What is the capital of Mars?",
-            "context": ""
-        }
-        
-        response = client.post("/chat", json=request_data)
-        assert response.status_code == 200
-        # Model should indicate uncertainty or inability to answer
 
 
 class TestPerformance:
     """Test performance characteristics"""
     
-    @patch('main.qa_pipeline')
-    def test_response_time(self, mock_pipeline):
+    @pytest.mark.performance
+    def test_response_time(self, client, mock_pipeline):
         """Test that responses are returned within reasonable time"""
-        import time
-        
         mock_pipeline.return_value = {'answer': 'Quick response'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        request_data = {
-            "question": "What is FastAPI?",
-            "context": "FastAPI is a web framework."
-        }
-        
-        start_time = time.time()
-        response = client.post("/chat", json=request_data)
-        end_time = time.time()
-        
-        assert response.status_code == 200
-        assert (end_time - start_time) < 5.0  # Should respond within 5 seconds
-    
-    @patch('main.qa_pipeline')
-    def test_large_context_handling(self, mock_pipeline):
-        """Test handling of large context"""
-        mock_pipeline.return_value = {'answer': 'Processed large context'}
-        mock_pipeline.__bool__ = lambda x: True
-        
-        # Create a large context (simulate real-world scenario)
-        large_context = "This is a test context. " * 100
         
-        request_data = {
-            "question": "What is this about?",
-            "context": large_context
-        }
+        start_time = perf_counter()
+        response = client.post("/chat", json=FASTAPI_QUESTION)
+        elapsed = perf_counter() - start_time
         
-        response = client.post("/chat", json=request_data)
         assert response.status_code == 200
+        assert elapsed < RESPONSE_TIME_BUDGET
 
 
 if __name__ == "__main__":